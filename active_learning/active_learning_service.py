@@ -5,18 +5,17 @@ Service to capture low-confidence images and handle reviewed/labeled ones.
 """
 
 import os
-import yaml
 import shutil
+import threading
 import cv2
 import numpy as np
 import datetime
 from pathlib import Path
 
-BASE = Path(__file__).parent.parent
-SETTINGS_FILE = BASE / "config" / "settings.yaml"
+from config.loader import get_settings
 
-with open(SETTINGS_FILE, "r") as f:
-    settings = yaml.safe_load(f)
+BASE = Path(__file__).parent.parent
+settings = get_settings()
 
 CONFIDENCE_THRESHOLD = settings['active_learning']['confidence_threshold']
 TRIGGER_COUNT = settings['active_learning']['retrain_trigger_count']
@@ -29,10 +28,69 @@ LABELED_DIR = BASE / settings['active_learning']['labeled_dir']
 PENDING_DIR.mkdir(parents=True, exist_ok=True)
 LABELED_DIR.mkdir(parents=True, exist_ok=True)
 
-def handle_detection(image_bytes: bytes, confidence: float, class_id: int):
+# Review thumbnails are stored next to the full image as thumb_<filename>
+THUMB_PREFIX  = "thumb_"
+THUMB_WIDTH   = 512
+THUMB_QUALITY = 80
+
+def thumbnail_name(filename: str) -> str:
+    return THUMB_PREFIX + filename
+
+def _is_review_image(name: str) -> bool:
+    return not name.startswith(THUMB_PREFIX)
+
+# In-memory view of review_pending/, so polling the list doesn't rescan the
+# directory. Kept in sync by handle_detection / label_image; a watchdog
+# observer (if installed) picks up files added or removed out-of-band.
+_state_lock = threading.Lock()
+_pending    = {f.name for f in PENDING_DIR.iterdir() if f.is_file() and _is_review_image(f.name)}
+# Number of labeled images in newly_labeled/, maintained by label_image and
+# re-counted from disk once it reaches the trigger (the retrain job moves the
+# consumed files out of the directory)
+def _count_labeled() -> int:
+    return sum(1 for _ in LABELED_DIR.glob("*.jpg"))
+
+_labeled_count = _count_labeled()
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+
+    class _PendingDirHandler(FileSystemEventHandler):
+        def on_created(self, event):
+            if not event.is_directory and _is_review_image(Path(event.src_path).name):
+                with _state_lock:
+                    _pending.add(Path(event.src_path).name)
+
+        def on_deleted(self, event):
+            if not event.is_directory:
+                with _state_lock:
+                    _pending.discard(Path(event.src_path).name)
+
+        def on_moved(self, event):
+            if not event.is_directory:
+                with _state_lock:
+                    _pending.discard(Path(event.src_path).name)
+                    dest = Path(event.dest_path)
+                    if dest.parent == PENDING_DIR and _is_review_image(dest.name):
+                        _pending.add(dest.name)
+
+    _observer = Observer()
+    _observer.daemon = True
+    _observer.schedule(_PendingDirHandler(), str(PENDING_DIR), recursive=False)
+    _observer.start()
+except ImportError:
+    _observer = None
+
+def handle_detection(image_bytes: bytes, confidence: float, class_id: int, img: np.ndarray = None):
     """
     Called after YOLO inference. If confidence < threshold,
-    saves the image to review_pending/.
+    saves the image to review_pending/, plus a small JPEG thumbnail
+    (thumb_<filename>) for the review UI. The full-resolution image is kept
+    because it becomes retraining data once labeled.
+
+    Pass `img` (the BGR array already decoded from `image_bytes`) to skip
+    decoding the bytes a second time.
     """
     if confidence < CONFIDENCE_THRESHOLD:
         try:
@@ -40,10 +98,21 @@ def handle_detection(image_bytes: bytes, confidence: float, class_id: int):
             filename = f"review_pending_{timestamp}_conf{confidence:.2f}_cls{class_id}.jpg"
             filepath = PENDING_DIR / filename
             
-            nparr = np.frombuffer(image_bytes, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            if img is None:
+                nparr = np.frombuffer(image_bytes, np.uint8)
+                img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
             
+            # Thumbnail first, so the review UI never sees an image without one
+            h, w = img.shape[:2]
+            if w > THUMB_WIDTH:
+                thumb = cv2.resize(img, (THUMB_WIDTH, max(1, THUMB_WIDTH * h // w)),
+                                   interpolation=cv2.INTER_AREA)
+                cv2.imwrite(str(PENDING_DIR / thumbnail_name(filename)), thumb,
+                            [cv2.IMWRITE_JPEG_QUALITY, THUMB_QUALITY])
+
             cv2.imwrite(str(filepath), img)
+            with _state_lock:
+                _pending.add(filename)
             return {"status": "FLAGGED", "file": filename, "reason": "Low confidence score"}
         except Exception as e:
             return {"status": "ERROR", "message": str(e)}
@@ -52,13 +121,15 @@ def handle_detection(image_bytes: bytes, confidence: float, class_id: int):
 
 def get_pending_images():
     """List images waiting for review."""
-    return [f.name for f in PENDING_DIR.iterdir() if f.is_file()]
+    with _state_lock:
+        return sorted(_pending)
 
 def label_image(filename: str, label_class: str, bounding_boxes: list = None):
     """
     Labels an image from review_pending/ and moves it to newly_labeled/.
     Bounding boxes can be saved in a YOLO format txt file.
     """
+    global _labeled_count
     pending_path = PENDING_DIR / filename
     if not pending_path.exists():
         return {"error": "File not found"}
@@ -67,6 +138,11 @@ def label_image(filename: str, label_class: str, bounding_boxes: list = None):
         # Move image
         labeled_img_path = LABELED_DIR / filename
         shutil.move(str(pending_path), str(labeled_img_path))
+        (PENDING_DIR / thumbnail_name(filename)).unlink(missing_ok=True)
+        with _state_lock:
+            _pending.discard(filename)
+            if labeled_img_path.suffix == ".jpg":
+                _labeled_count += 1
         
         # Save YOLO annotation file for fine-tuning
         if bounding_boxes is not None:
@@ -83,5 +159,11 @@ def label_image(filename: str, label_class: str, bounding_boxes: list = None):
 
 def check_retrain_trigger():
     """Check if the number of newly labeled images exceeds the threshold."""
-    labeled_count = len(list(LABELED_DIR.glob("*.jpg")))
-    return labeled_count >= TRIGGER_COUNT
+    global _labeled_count
+    with _state_lock:
+        if _labeled_count < TRIGGER_COUNT:
+            return False
+        # Only scan the directory when the cheap counter says "retrain" —
+        # this picks up files consumed by incremental_retrain.py
+        _labeled_count = _count_labeled()
+        return _labeled_count >= TRIGGER_COUNT
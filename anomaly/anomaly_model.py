@@ -5,17 +5,18 @@ Builds and trains a CNN Autoencoder on GOOD (non-defective) images.
 """
 
 import os
-import yaml
+import sys
 from pathlib import Path
 import numpy as np
 import tensorflow as tf
 from tensorflow.keras import layers, models, Sequential
 
 BASE = Path(__file__).parent.parent
-SETTINGS_FILE = BASE / "config" / "settings.yaml"
+sys.path.insert(0, str(BASE))   # `python anomaly/anomaly_model.py` puts anomaly/ first
 
-with open(SETTINGS_FILE, "r") as f:
-    settings = yaml.safe_load(f)
+from config.loader import get_settings
+
+settings = get_settings()
 
 img_size = settings['training']['yolo']['img_size']
 epochs = settings['training']['autoencoder']['epochs']
@@ -59,6 +60,22 @@ def build_autoencoder():
     
     return autoencoder
 
+def build_inference_model(autoencoder):
+    """
+    Return a serving copy of `autoencoder` without the data_augmentation block.
+
+    The Random* layers are identity at inference but still dispatch ops on
+    every call. The returned model reuses the trained layers (shared
+    weights) on a fresh input, skipping augmentation.
+    """
+    input_img = layers.Input(shape=(img_size, img_size, 3))
+    x = input_img
+    for layer in autoencoder.layers:
+        if isinstance(layer, layers.InputLayer) or layer.name == "data_augmentation":
+            continue
+        x = layer(x)
+    return models.Model(input_img, x, name="autoencoder_infer")
+
 def train_autoencoder():
     print(f"  AI Defect Detection — Autoencoder Training")
     model = build_autoencoder()
@@ -76,5 +93,10 @@ def train_autoencoder():
     model.save(str(model_path))
     print(f"✅ Autoencoder template saved to {model_path}")
 
+    # Slim serving model (no augmentation layers), loaded by anomaly_service
+    infer_path = BASE / "models" / "autoencoder_infer.h5"
+    build_inference_model(model).save(str(infer_path))
+    print(f"✅ Inference autoencoder saved to {infer_path}")
+
 if __name__ == "__main__":
     train_autoencoder()
@@ -6,12 +6,14 @@ Dual-model: YOLOv8 (object detection) + CNN+LSTM (binary classification).
 Includes Transfer Learning, Anomaly Detection, and Active Learning integration.
 """
 
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory
 from flask_cors import CORS
-from services.model_service import load_model, predict_defects, CLASS_INFO
-from services.cnn_lstm_service import load_cnn_lstm_model, predict_cnn_lstm
-from anomaly.anomaly_service import detect_anomaly
-from active_learning.active_learning_service import handle_detection, get_pending_images, label_image, PENDING_DIR
+from services.model_service import load_model, predict_defects_batch, CLASS_INFO
+from services.cnn_lstm_service import get_cnn_lstm_model, predict_cnn_lstm_batch, decode_to_gpu
+from services.batcher import MicroBatcher
+from anomaly.anomaly_service import detect_anomaly_batch
+from active_learning.active_learning_service import handle_detection, get_pending_images, label_image, thumbnail_name, PENDING_DIR
+from config.loader import get_settings
 
 import os
 import json
@@ -20,18 +22,64 @@ import cv2
 import numpy as np
 import webbrowser
 import threading
+import time
 from datetime import datetime
 from collections import deque
+from itertools import count
+
+try:
+    import orjson   # SIMD JSON encoder — much faster on large base64/history payloads
+except ImportError:
+    orjson = None
 
 app = Flask(__name__)
 CORS(app)
 
 # ── Load models at startup ─────────────────────────────────────────────────────
 yolo_model     = load_model()
-cnn_lstm_model = load_cnn_lstm_model()
+cnn_lstm_model = get_cnn_lstm_model()
+
+# Batch limits, shared by the warm-up below and the micro-batchers
+_batching = get_settings().get("serving", {}).get("batching", {})
+_batch_kw = {
+    "max_batch":   _batching.get("max_batch", 8),
+    "max_wait_ms": _batching.get("max_wait_ms", 10),
+}
+
+def _warm_up():
+    """
+    Run dummy forwards through every model so cuDNN autotuning, TorchScript
+    and XLA compilation happen at startup instead of on the first request.
+    The autoencoder's XLA graph is compiled per batch size, so it is run
+    once for every size the micro-batcher can produce.
+    Does not touch history or active learning.
+    """
+    dummy = np.full((640, 640, 3), 128, dtype=np.uint8)
+    sizes = range(1, _batch_kw["max_batch"] + 1)
+    for name, fn, runs in [
+        ("YOLOv8",      lambda: predict_defects_batch(yolo_model, [dummy]),      1),
+        ("CNN+LSTM",    lambda: predict_cnn_lstm_batch(cnn_lstm_model, [dummy]), 3),
+        ("Autoencoder", lambda: [detect_anomaly_batch([dummy] * n) for n in sizes], 1),
+    ]:
+        try:
+            for _ in range(runs):
+                fn()
+            print(f"✓ {name} warmed up")
+        except Exception as e:
+            print(f"⚠️  {name} warm-up failed: {e}")
+
+_warm_up()
+
+# ── Micro-batchers: coalesce concurrent requests into one forward per model ───
+yolo_batcher    = MicroBatcher(lambda imgs: predict_defects_batch(yolo_model, imgs),
+                               name="yolo-batcher", **_batch_kw)
+cnn_batcher     = MicroBatcher(lambda imgs: predict_cnn_lstm_batch(cnn_lstm_model, imgs),
+                               name="cnn-lstm-batcher", **_batch_kw)
+anomaly_batcher = MicroBatcher(detect_anomaly_batch, name="anomaly-batcher", **_batch_kw)
 
 # ── In-memory detection history (last 50) ─────────────────────────────────────
 history_store = deque(maxlen=50)
+_history_ids  = count(1)   # monotonic ids; next() is atomic under the GIL
 
 DATASETS = [
     {
@@ -42,10 +90,26 @@ DATASETS = [
     }
 ]
 
+def fastjson(obj):
+    """jsonify() replacement that encodes with orjson when it is installed."""
+    if orjson is None:
+        return jsonify(obj)
+    return Response(
+        orjson.dumps(obj, option=orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY),
+        mimetype="application/json",
+    )
+
+def _decode_image(image_bytes: bytes) -> np.ndarray:
+    """Decode upload bytes to a BGR array in the request thread (before batching)."""
+    img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Could not decode the uploaded image.")
+    return img
+
 def _record_history(filename: str, model_type: str, result: dict):
     entry = {
-        "id":         len(history_store) + 1,
-        "timestamp":  datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "id":         next(_history_ids),
+        "timestamp_ns": time.time_ns(),   # formatted lazily by /api/history
         "filename":   filename,
         "model":      model_type,
         "verdict":    result.get("verdict_label") or result.get("status"),
@@ -81,7 +145,7 @@ def detect():
             return jsonify({"error": "No image uploaded"}), 400
         file = request.files["image"]
         image_bytes = file.read()
-        results     = predict_defects(yolo_model, image_bytes)
+        results     = yolo_batcher.submit(_decode_image(image_bytes)).result()
         _record_history(file.filename, "YOLOv8", results)
         return jsonify(results)
     except Exception as e:
@@ -94,7 +158,12 @@ def cnn_detect():
             return jsonify({"error": "No image uploaded"}), 400
         file = request.files["image"]
         image_bytes = file.read()
-        results     = predict_cnn_lstm(cnn_lstm_model, image_bytes)
+        # JPEGs on CUDA decode via nvJPEG straight to the GPU; decoding stays
+        # in the request thread so a bad upload only fails its own request
+        img         = decode_to_gpu(image_bytes)
+        if img is None:
+            img = _decode_image(image_bytes)
+        results     = cnn_batcher.submit(img).result()
         _record_history(file.filename, "CNN+LSTM", results)
         return jsonify(results)
     except Exception as e:
@@ -110,36 +179,40 @@ def pipeline():
             return jsonify({"error": "No image selected"}), 400
 
         image_bytes = file.read()
-        
-        # Step 0: Anomaly Detection directly on input
-        anomaly_result = detect_anomaly(image_bytes)
 
-        # Step 1: YOLOv8 Frontend
-        yolo_results = predict_defects(yolo_model, image_bytes)
-        
-        # Step 1.5: Active Learning (Flag low confidence for review)
-        al_status = handle_detection(image_bytes, yolo_results["confidence"], 0)
-        
+        # Decode once (BGR, OpenCV order) and share across every stage
         nparr    = np.frombuffer(image_bytes, np.uint8)
         img_cv   = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        if img_cv is None:
+            return jsonify({"error": "Could not decode the uploaded image."}), 400
+        
+        # Step 0 & 1: Anomaly Detection + YOLOv8 Frontend, run concurrently
+        anomaly_future = anomaly_batcher.submit(img_cv)
+        yolo_results   = yolo_batcher.submit(img_cv).result()
+        anomaly_result = anomaly_future.result()
+        
+        # Step 1.5: Active Learning (Flag low confidence for review)
+        al_status = handle_detection(image_bytes, yolo_results["confidence"], 0, img=img_cv)
         
         verified_defects = []
         discarded_defects = []
         
-        # Step 2 & 3: Crop and Verify
+        # Step 2: Crop every detection
+        crops, cropped_defects = [], []
+        h, w = img_cv.shape[:2]
         for defect in yolo_results.get("defects", []):
             x1, y1, x2, y2 = defect["bbox"]
-            h, w = img_cv.shape[:2]
             x1, y1, x2, y2 = max(0, x1), max(0, y1), min(w, x2), min(h, y2)
             
             crop = img_cv[y1:y2, x1:x2]
             if crop.size == 0: continue
-            
-            is_success, buffer = cv2.imencode(".jpg", crop)
-            if not is_success: continue
-            crop_bytes = buffer.tobytes()
-            
-            cnn_result = predict_cnn_lstm(cnn_lstm_model, crop_bytes)
+            crops.append(crop)
+            cropped_defects.append(defect)
+
+        # Step 3: Verify crops — batched with crops from concurrent requests
+        cnn_futures = [cnn_batcher.submit(crop) for crop in crops]
+        cnn_results = [f.result() for f in cnn_futures]
+        for defect, cnn_result in zip(cropped_defects, cnn_results):
             defect["verification"] = {
                 "verdict":    cnn_result["verdict"],
                 "confidence": cnn_result["confidence"],
@@ -168,7 +241,7 @@ def pipeline():
         }
         
         _record_history(file.filename, "Pipeline", final_results)
-        return jsonify(final_results)
+        return fastjson(final_results)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -181,7 +254,11 @@ def get_pending():
 
 @app.route("/api/pending-images/<filename>")
 def serve_pending_image(filename):
-    """Serves the pending image file."""
+    """Serves the pending image's thumbnail (if any); ?full=1 for the original."""
+    if request.args.get("full") != "1":
+        thumb = thumbnail_name(filename)
+        if (PENDING_DIR / thumb).is_file():
+            return send_from_directory(PENDING_DIR, thumb)
     return send_from_directory(PENDING_DIR, filename)
 
 @app.route("/api/label", methods=["POST"])
@@ -199,13 +276,22 @@ def label_pending_image():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def _format_history_timestamps(entries: list) -> list:
+    """Fill in each entry's display timestamp once, the first time it is served."""
+    for entry in entries:
+        if "timestamp" not in entry:
+            entry["timestamp"] = time.strftime(
+                "%Y-%m-%d %H:%M:%S", time.localtime(entry["timestamp_ns"] / 1e9))
+    return entries
+
 @app.route("/api/history")
 def history():
-    return jsonify({"history": list(history_store), "total": len(history_store)})
+    entries = _format_history_timestamps(list(history_store))
+    return fastjson({"history": entries, "total": len(entries)})
 
 @app.route("/api/classes")
 def classes():
-    return jsonify({str(k): v for k, v in CLASS_INFO.items()})
+    return fastjson({str(k): v for k, v in CLASS_INFO.items()})
 
 # ── Health Check ──────────────────────────────────────────────────────────────
 @app.route("/health")
@@ -217,7 +303,8 @@ def health():
         "status": "ok",
         "yolo_model": yolo_status,
         "cnn_lstm_model": cnn_lstm_status,
-        "anomaly_model": "loaded" if os.path.exists("models/autoencoder.h5") else "not loaded",
+        "anomaly_model": "loaded" if (os.path.exists("models/autoencoder_infer.h5")
+                                      or os.path.exists("models/autoencoder.h5")) else "not loaded",
     })
 
 # ── Report Generation ─────────────────────────────────────────────────────────
@@ -251,7 +338,7 @@ def generate_report():
                 f"❌ {len(defects)} defect(s) detected. Remove component from production line."
             ),
         }
-        return jsonify({"report": report})
+        return fastjson({"report": report})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -18,14 +18,16 @@ Architecture
   Dropout(0.4)
        │
   FC(256 → 128) → ReLU
-  FC(128 → 1)   → Sigmoid
+  FC(128 → 1)   → logit
        │
-  P(defective) ∈ [0, 1]
+  P(defective) = sigmoid(logit) ∈ [0, 1]   (applied by the loss / at inference)
 
 For MVP single-image upload: seq_len = 1.
 For production camera stream: pass seq_len > 1 frames as a tensor.
 """
 
+import copy
+
 import torch
 import torch.nn as nn
 from torchvision import models
@@ -81,8 +83,7 @@ class CNNLSTM(nn.Module):
             nn.Dropout(p=0.4),
             nn.Linear(hidden_size, 128),
             nn.ReLU(inplace=True),
-            nn.Linear(128, 1),
-            nn.Sigmoid(),
+            nn.Linear(128, 1),         # logit; train with BCEWithLogitsLoss
         )
 
     # ── Forward pass ─────────────────────────────────────────────────
@@ -96,7 +97,14 @@ class CNNLSTM(nn.Module):
 
         Returns
         -------
-        torch.Tensor  shape [batch, 1]  — probability of being defective
+        torch.Tensor  shape [batch, 1]  — logit of being defective (sigmoid → probability)
+        """
+        return self.forward_features(x)[0]
+
+    def forward_features(self, x: torch.Tensor):
+        """
+        Same as forward(), but also returns the last conv feature map of the
+        final frame, [batch, 576, H/32, W/32] — the input for activation CAMs.
         """
         if x.dim() == 4:                # single image → add seq dim
             x = x.unsqueeze(1)
@@ -105,15 +113,28 @@ class CNNLSTM(nn.Module):
 
         # Extract CNN features for every frame in the sequence
         x = x.view(B * T, C, H, W)     # [B*T, C, H, W]
-        feats = self.cnn(x)             # [B*T, 576]
+        fmap  = self.cnn[0](x)          # [B*T, 576, h, w]
+        feats = self.cnn[2](self.cnn[1](fmap))  # [B*T, 576]
         feats = feats.view(B, T, -1)    # [B, T, 576]
 
         # LSTM over the sequence
         lstm_out, _ = self.lstm(feats)  # [B, T, hidden]
         last_hidden  = lstm_out[:, -1, :]  # [B, hidden]
 
-        out = self.head(last_hidden)    # [B, 1]
-        return out
+        out  = self.head(last_hidden)   # [B, 1]
+        fmap = fmap.view(B, T, *fmap.shape[1:])[:, -1]
+        return out, fmap
+
+
+class WithFeatures(nn.Module):
+    """Wraps a CNNLSTM so forward() returns (logit, feature map) — for tracing / export."""
+
+    def __init__(self, model: CNNLSTM):
+        super().__init__()
+        self.model = model
+
+    def forward(self, x: torch.Tensor):
+        return self.model.forward_features(x)
 
 
 # ── Convenience constructor ───────────────────────────────────────────────────
@@ -127,6 +148,51 @@ def build_model(pretrained: bool = True) -> CNNLSTM:
     )
 
 
+def script_for_inference(model: CNNLSTM, device: torch.device,
+                         img_size: int = 224) -> torch.jit.ScriptModule:
+    """
+    Return a traced + frozen copy of `model` for serving.
+
+    The copy is put in eval mode and channels_last memory format, cast to
+    FP16 on CUDA, traced on a [1, 3, img_size, img_size] example and passed
+    through torch.jit.optimize_for_inference. Like forward_features() it
+    returns (logit, feature map). It has no autograd support — keep
+    the original module for training. Inputs must match: channels_last,
+    and FP16 when on CUDA.
+
+    On CPU, oneDNN Graph fusion is enabled for TorchScript (fusing conv /
+    LSTM op chains) and the frozen copy is warmed up so the fused graph is
+    built before the first request.
+    """
+    dtype  = torch.float16 if device.type == "cuda" else torch.float32
+    frozen = copy.deepcopy(model).eval().to(device=device, dtype=dtype)
+    frozen = frozen.to(memory_format=torch.channels_last)
+
+    example = torch.randn(1, 3, img_size, img_size, device=device, dtype=dtype)
+    example = example.to(memory_format=torch.channels_last)
+    if device.type == "cpu" and hasattr(torch.jit, "enable_onednn_fusion"):
+        torch.jit.enable_onednn_fusion(True)
+
+    with torch.no_grad():
+        traced = torch.jit.trace(WithFeatures(frozen).eval(), example)
+    optimized = torch.jit.optimize_for_inference(traced)
+
+    # The profiling executor specialises / fuses over the first couple of runs
+    with torch.no_grad():
+        for _ in range(2):
+            optimized(example)
+    return optimized
+
+
+def select_quantized_engine() -> str:
+    """Set the INT8 backend to oneDNN (AVX-512 VNNI dispatch), falling back to x86/fbgemm."""
+    for name in ("onednn", "x86", "fbgemm"):
+        if name in torch.backends.quantized.supported_engines:
+            torch.backends.quantized.engine = name
+            return name
+    return torch.backends.quantized.engine
+
+
 if __name__ == "__main__":
     model = build_model()
     # Quick sanity check: single image
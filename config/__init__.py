@@ -0,0 +1 @@
+# config package
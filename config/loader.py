@@ -0,0 +1,73 @@
+"""
+loader.py
+=========
+Shared, cached access to config/settings.yaml.
+
+Every service used to open and parse the YAML on import. `get_settings()`
+parses it once per process and re-parses only when the file on disk changes.
+If `scripts/freeze_settings.py` has generated config/_settings_frozen.py from
+the current YAML, the settings are imported from it and no YAML is parsed.
+
+Exposes:
+  get_settings(path=SETTINGS_FILE) → dict of parsed settings (read-only)
+"""
+
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+import yaml
+
+# LibYAML's C loader is much faster than the pure-Python one when available
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# ── Paths ──────────────────────────────────────────────────────────────────────
+CONFIG_DIR    = Path(__file__).parent
+SETTINGS_FILE = CONFIG_DIR / "settings.yaml"
+FROZEN_FILE   = CONFIG_DIR / "_settings_frozen.py"
+
+# ── Cache ──────────────────────────────────────────────────────────────────────
+# (path, mtime_ns, size) → parsed dict.  Callers only read the settings, so the
+# cached dict is returned directly rather than a deep copy.
+_cache = OrderedDict()
+_CACHE_MAX = 8
+
+
+def _parse_yaml(path: Path) -> dict:
+    with open(path, "r") as f:
+        return yaml.load(f, Loader=_YamlLoader) or {}
+
+
+def _load_frozen(st: os.stat_result):
+    """Return the frozen settings if they were generated from this exact file."""
+    try:
+        from config import _settings_frozen as frozen
+    except ImportError:
+        return None
+    if (frozen.SOURCE_MTIME_NS, frozen.SOURCE_SIZE) != (st.st_mtime_ns, st.st_size):
+        return None
+    return frozen.SETTINGS
+
+
+def get_settings(path=SETTINGS_FILE) -> dict:
+    """Return the parsed settings, re-reading the file only if it changed."""
+    path = str(path)
+    st   = os.stat(path)
+    key  = (path, st.st_mtime_ns, st.st_size)
+
+    settings = _cache.get(key)
+    if settings is None:
+        if Path(path) == SETTINGS_FILE:
+            settings = _load_frozen(st)
+        if settings is None:
+            settings = _parse_yaml(Path(path))
+        # Drop stale entries for the same file before inserting the fresh one
+        for stale in [k for k in _cache if k[0] == path]:
+            del _cache[stale]
+        _cache[key] = settings
+        while len(_cache) > _CACHE_MAX:
+            _cache.popitem(last=False)
+    return settings
@@ -22,9 +22,12 @@ Class mapping (matches dataset.yaml):
 import os
 import shutil
 import random
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import cv2
 
+from reorganize_dataset import link_or_copy, IO_WORKERS
+
 # ── Paths ────────────────────────────────────────────────────────────────────
 BASE       = Path(__file__).parent
 DATA_DIR   = BASE / "data"
@@ -51,14 +54,37 @@ def make_dirs():
     print(f"[✓] Output directory created/reset: {OUT_DIR}")
 
 
-def copy_and_label(src_img, dst_split, stem, labels):
-    """Copy image to dest, write YOLO label file."""
+def make_label_template(name, labels):
+    """
+    Write a shared YOLO label file once (under OUT_DIR/label_templates/).
+    Images whose labels are identical hardlink to it instead of each
+    creating and writing their own file.
+    """
+    tpl_dir = OUT_DIR / "label_templates"
+    tpl_dir.mkdir(parents=True, exist_ok=True)
+    template = tpl_dir / f"{name}.txt"
+    template.write_text("".join(line + "\n" for line in labels))
+    return template
+
+
+def copy_and_label(src_img, dst_split, stem, labels, template=None):
+    """Hardlink (or copy) image to dest, write YOLO label file."""
     img_dst = OUT_DIR / "images" / dst_split / (stem + Path(src_img).suffix)
     lbl_dst = OUT_DIR / "labels" / dst_split / (stem + ".txt")
-    shutil.copy2(src_img, img_dst)
-    with open(lbl_dst, "w") as f:
-        for line in labels:
-            f.write(line + "\n")
+    link_or_copy(src_img, img_dst)
+    if template is not None:
+        try:
+            os.link(template, lbl_dst)
+            return
+        except OSError:
+            pass
+    # Raw os.write of the pre-encoded bytes — skips the text-mode buffer layer
+    data = "".join(line + "\n" for line in labels).encode()
+    fd   = os.open(lbl_dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
 
 
 def split(items):
@@ -86,21 +112,27 @@ def process_binary():
         return
 
     # Create dummy bounding box for the entire image (cx, cy, w, h = 0.5)
-    def _proc(images, cls_id, prefix):
+    def _proc(images, cls_id, prefix, name):
         train_imgs, val_imgs = split(list(images))
         
-        for imgs, split_name in [(train_imgs, "train"), (val_imgs, "val")]:
-            for img_p in imgs:
-                # Assuming full image is the object for simplified binary classification
-                # CX, CY, W, H = 0.5, 0.5, 1.0, 1.0
-                labels = [f"{cls_id} 0.500000 0.500000 1.000000 1.000000"]
-                stem = f"{prefix}_{img_p.stem}"
-                copy_and_label(img_p, split_name, stem, labels)
+        # Assuming full image is the object for simplified binary classification
+        # CX, CY, W, H = 0.5, 0.5, 1.0, 1.0
+        labels = [f"{cls_id} 0.500000 0.500000 1.000000 1.000000"]
+        # Every image in this class gets the same label → one shared file
+        template = make_label_template(name, labels)
+        jobs = [
+            (img_p, split_name, f"{prefix}_{img_p.stem}", labels, template)
+            for imgs, split_name in [(train_imgs, "train"), (val_imgs, "val")]
+            for img_p in imgs
+        ]
+        # Copies + label writes are I/O-bound; run them on a thread pool
+        with ThreadPoolExecutor(max_workers=IO_WORKERS) as pool:
+            list(pool.map(lambda job: copy_and_label(*job), jobs))
                 
         return len(train_imgs), len(val_imgs)
 
-    g_train, g_val = _proc(good_imgs, CLS_GOOD, "ok")
-    b_train, b_val = _proc(bad_imgs, CLS_BAD, "ng")
+    g_train, g_val = _proc(good_imgs, CLS_GOOD, "ok", "_good")
+    b_train, b_val = _proc(bad_imgs, CLS_BAD, "ng", "_bad")
     
     print(f"   → GOOD: {g_train} train / {g_val} val")
     print(f"   → BAD:  {b_train} train / {b_val} val")
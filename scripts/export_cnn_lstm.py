@@ -0,0 +1,114 @@
+"""
+export_cnn_lstm.py
+==================
+Exports the trained CNN+LSTM classifier to ONNX (simplified with onnxsim
+when it is installed) and, when `trtexec` is on PATH, builds an FP16
+TensorRT engine from it.
+
+USAGE
+-----
+  python scripts/export_cnn_lstm.py
+  python scripts/export_cnn_lstm.py --no-engine      # ONNX only
+  python scripts/export_cnn_lstm.py --max-batch 16   # default: serving.batching.max_batch
+
+Outputs
+-------
+  models/cnn_lstm.onnx    — [N, 3, 224, 224] → ([N, 1], [N, 576, 7, 7]) graph
+                            with a dynamic batch axis: logit and last conv
+                            feature map
+  models/cnn_lstm.engine  — TensorRT engine, picked up automatically by
+                            services/cnn_lstm_service.load_cnn_lstm_model()
+"""
+
+import argparse
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import torch
+
+BASE = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE))
+
+from cnn_lstm_model import build_model, WithFeatures
+from config.loader import get_settings
+
+MODELS_DIR  = BASE / "models"
+WEIGHTS     = MODELS_DIR / "cnn_lstm_best.pth"
+ONNX_PATH   = MODELS_DIR / "cnn_lstm.onnx"
+ENGINE_PATH = MODELS_DIR / "cnn_lstm.engine"
+IMG_SIZE    = 224
+
+
+def export_onnx():
+    if not WEIGHTS.exists():
+        raise FileNotFoundError(
+            f"{WEIGHTS} not found.\n"
+            "Run:  python training/cnn_lstm_train.py  first."
+        )
+    model = build_model(pretrained=False)
+    model.load_state_dict(torch.load(str(WEIGHTS), map_location="cpu",
+                                     mmap=True, weights_only=True))
+    model.eval()
+
+    dummy = torch.randn(1, 3, IMG_SIZE, IMG_SIZE)
+    torch.onnx.export(
+        WithFeatures(model).eval(), (dummy,), str(ONNX_PATH),
+        opset_version = 17,
+        input_names   = ["x"],
+        output_names  = ["logit", "fmap"],
+        dynamic_axes  = {"x": {0: "N"}, "logit": {0: "N"}, "fmap": {0: "N"}},
+    )
+    print(f"✅ ONNX model saved → {ONNX_PATH}")
+    simplify_onnx()
+
+
+def simplify_onnx():
+    """Constant-fold / simplify the exported graph in place with onnxsim, if installed."""
+    try:
+        import onnx
+        from onnxsim import simplify
+    except ImportError:
+        print("⚠️  onnxsim not installed — keeping the unsimplified graph.")
+        return
+    simplified, ok = simplify(onnx.load(str(ONNX_PATH)))
+    if not ok:
+        print("⚠️  onnxsim check failed — keeping the unsimplified graph.")
+        return
+    onnx.save(simplified, str(ONNX_PATH))
+    print(f"✅ ONNX graph simplified → {ONNX_PATH}")
+
+
+def build_engine(max_batch: int):
+    chw = f"3x{IMG_SIZE}x{IMG_SIZE}"
+    cmd = [
+        f"--onnx={ONNX_PATH}",
+        "--fp16",
+        f"--saveEngine={ENGINE_PATH}",
+        f"--minShapes=x:1x{chw}",
+        f"--optShapes=x:{max_batch}x{chw}",
+        f"--maxShapes=x:{max_batch}x{chw}",
+        "--memPoolSize=workspace:4096M",
+    ]
+    trtexec = shutil.which("trtexec")
+    if trtexec is None:
+        print("⚠️  trtexec not found on PATH — skipping TensorRT engine build.")
+        print(f"   Build it on the GPU host with:\n   trtexec {' '.join(cmd)}")
+        return
+    subprocess.run([trtexec, *cmd], check=True)
+    print(f"✅ TensorRT engine saved → {ENGINE_PATH} (batch 1–{max_batch})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export CNN+LSTM to ONNX / TensorRT")
+    parser.add_argument("--no-engine", action="store_true",
+                        help="only export ONNX, skip the TensorRT build")
+    parser.add_argument("--max-batch", type=int,
+                        default=get_settings().get("serving", {}).get("batching", {}).get("max_batch", 8),
+                        help="largest batch the TensorRT engine accepts")
+    args = parser.parse_args()
+
+    export_onnx()
+    if not args.no_engine:
+        build_engine(args.max_batch)
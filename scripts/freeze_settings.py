@@ -0,0 +1,53 @@
+"""
+freeze_settings.py
+==================
+Pre-compiles config/settings.yaml into config/_settings_frozen.py so that
+services can import the settings as a Python literal instead of parsing YAML
+on every process start.
+
+USAGE
+-----
+  python scripts/freeze_settings.py
+
+Re-run after editing settings.yaml. A stale frozen module is ignored
+automatically (config.loader compares the recorded mtime/size).
+"""
+
+import os
+import sys
+import pprint
+from pathlib import Path
+
+BASE = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE))
+
+from config.loader import SETTINGS_FILE, FROZEN_FILE, _parse_yaml
+
+TEMPLATE = '''"""
+_settings_frozen.py
+===================
+AUTO-GENERATED by scripts/freeze_settings.py from config/settings.yaml.
+Do not edit by hand — edit settings.yaml and re-run the script.
+"""
+
+SOURCE_MTIME_NS = {mtime_ns}
+SOURCE_SIZE     = {size}
+
+SETTINGS = {settings}
+'''
+
+
+def freeze():
+    st       = os.stat(SETTINGS_FILE)
+    settings = _parse_yaml(SETTINGS_FILE)
+
+    FROZEN_FILE.write_text(TEMPLATE.format(
+        mtime_ns = st.st_mtime_ns,
+        size     = st.st_size,
+        settings = pprint.pformat(settings, indent=1, sort_dicts=False),
+    ))
+    print(f"✅ Frozen settings written → {FROZEN_FILE}")
+
+
+if __name__ == "__main__":
+    freeze()
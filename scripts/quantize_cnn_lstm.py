@@ -0,0 +1,118 @@
+"""
+quantize_cnn_lstm.py
+====================
+Builds an INT8 CPU-serving copy of the CNN+LSTM classifier.
+
+The MobileNetV3-Small conv features are statically quantized with PyTorch FX
+(calibrated on images from data/good and data/bad); pooling, the LSTM and
+the classifier head stay in FP32. The result is traced (returning the
+logit and the feature map, like the FP32 serving copy) and saved as
+TorchScript.
+
+USAGE
+-----
+  python scripts/quantize_cnn_lstm.py
+  python scripts/quantize_cnn_lstm.py --calib-images 400
+
+Outputs
+-------
+  models/cnn_lstm_int8.pt — loaded by services/cnn_lstm_service when no GPU
+                            is available
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+from torch.ao.quantization import get_default_qconfig_mapping
+from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+BASE = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE))
+
+from cnn_lstm_model import build_model, select_quantized_engine, WithFeatures
+
+MODELS_DIR = BASE / "models"
+WEIGHTS    = MODELS_DIR / "cnn_lstm_best.pth"
+INT8_PATH  = MODELS_DIR / "cnn_lstm_int8.pt"
+GOOD_DIR   = BASE / "data" / "good"
+BAD_DIR    = BASE / "data" / "bad"
+IMG_SIZE   = 224
+SEED       = 42
+
+# ImageNet normalisation, as in services/cnn_lstm_service.py
+MEAN = torch.tensor([0.485, 0.456, 0.406]).view(1, 3, 1, 1)
+STD  = torch.tensor([0.229, 0.224, 0.225]).view(1, 3, 1, 1)
+
+
+def load_rgb(path: Path):
+    """
+    Same pixels the server and the preloaded val set see: cv2 decode →
+    INTER_AREA resize to IMG_SIZE → RGB. None if the file can't be read.
+    """
+    bgr = cv2.imread(str(path), cv2.IMREAD_COLOR)
+    if bgr is None:
+        return None
+    bgr = cv2.resize(bgr, (IMG_SIZE, IMG_SIZE), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+
+
+def calibration_batches(n_images: int, batch_size: int = 16):
+    paths = sorted(GOOD_DIR.glob("*.jpg")) + sorted(BAD_DIR.glob("*.jpg"))
+    if not paths:
+        raise FileNotFoundError(
+            "No calibration images in data/good/ or data/bad/.\n"
+            "Run:  python reorganize_dataset.py  first."
+        )
+    random.seed(SEED)
+    paths = random.sample(paths, min(n_images, len(paths)))
+    for i in range(0, len(paths), batch_size):
+        rgb = [img for img in map(load_rgb, paths[i:i + batch_size]) if img is not None]
+        if not rgb:
+            continue
+        batch = torch.from_numpy(np.stack(rgb)).permute(0, 3, 1, 2).float().div_(255.0)
+        yield (batch - MEAN) / STD
+
+
+def quantize(n_images: int):
+    engine = select_quantized_engine()
+    print(f"  Quantized engine : {engine}")
+
+    model = build_model(pretrained=False)
+    model.load_state_dict(torch.load(str(WEIGHTS), map_location="cpu",
+                                     mmap=True, weights_only=True))
+    model.eval()
+
+    # Quantize only the conv features; pooling, LSTM + head stay FP32.
+    # The result dequantizes, so the feature map comes out as FP32 for the CAM.
+    example = (torch.randn(1, 3, IMG_SIZE, IMG_SIZE),)
+    features = prepare_fx(model.cnn[0], get_default_qconfig_mapping(engine), example)
+
+    with torch.no_grad():
+        for batch in calibration_batches(n_images):
+            features(batch)
+    model.cnn[0] = convert_fx(features)
+
+    with torch.no_grad():
+        traced = torch.jit.trace(WithFeatures(model).eval(), example)
+    traced = torch.jit.freeze(traced)
+    torch.jit.save(traced, str(INT8_PATH))
+    print(f"✅ INT8 model saved → {INT8_PATH}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="INT8-quantize the CNN+LSTM backbone")
+    parser.add_argument("--calib-images", type=int, default=200,
+                        help="number of data/good + data/bad images to calibrate on")
+    args = parser.parse_args()
+
+    if not WEIGHTS.exists():
+        raise FileNotFoundError(
+            f"{WEIGHTS} not found.\n"
+            "Run:  python training/cnn_lstm_train.py  first."
+        )
+    quantize(args.calib_images)
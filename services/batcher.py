@@ -0,0 +1,79 @@
+"""
+batcher.py
+==========
+Server-side micro-batching for the model services.
+
+Flask handles each request on its own thread, so under concurrent load every
+model would otherwise run at batch=1. A MicroBatcher collects items submitted
+from many threads, waits at most `max_wait_ms` after the first one arrives,
+and runs them through the model in a single batched call.
+
+Exposes:
+  MicroBatcher(batch_fn, max_batch=8, max_wait_ms=10, name="batcher")
+      .submit(item) → concurrent.futures.Future resolving to batch_fn's
+                      result for that item
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item calls into batched calls.
+
+    Parameters
+    ----------
+    batch_fn    : callable(list) → list of results, same length and order
+    max_batch   : largest batch handed to `batch_fn`          (default 8)
+    max_wait_ms : longest an item waits for others to join    (default 10)
+                  — bounds the latency added to a lone request
+    name        : worker thread name (for logs / debuggers)
+    """
+
+    def __init__(self, batch_fn, max_batch: int = 8, max_wait_ms: float = 10,
+                 name: str = "batcher"):
+        self.batch_fn  = batch_fn
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait  = max(0.0, max_wait_ms / 1000.0)
+        self._queue    = queue.Queue()
+        self._worker   = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, item) -> Future:
+        """Queue `item`; the returned Future resolves when its batch has run."""
+        fut = Future()
+        self._queue.put((item, fut))
+        return fut
+
+    # ── Worker ───────────────────────────────────────────────────────────────
+    def _collect(self) -> list:
+        """Block for one item, then drain more until full or the deadline."""
+        batch    = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch   = self._collect()
+            items   = [item for item, _ in batch]
+            futures = [fut  for _, fut in batch]
+            try:
+                results = self.batch_fn(items)
+            except Exception as e:
+                for fut in futures:
+                    fut.set_exception(e)
+                continue
+            for fut, res in zip(futures, results):
+                fut.set_result(res)
@@ -5,46 +5,101 @@ Inference service for the CNN + LSTM defect classifier.
 
 Exposes:
   load_cnn_lstm_model()         → model (ready for inference)
+  get_cnn_lstm_model()          → the process-wide model, loaded on first call
   predict_cnn_lstm(model, img_bytes) → dict with verdict, confidence, heatmap
+  predict_cnn_lstm_array(model, img_bgr)   → same dict, from a decoded BGR array
+  predict_cnn_lstm_batch(model, items)     → list of such dicts, one forward pass
+                                             (items: BGR arrays, raw bytes and/or
+                                              decode_to_gpu() tensors)
+  decode_to_gpu(img_bytes)      → CUDA uint8 RGB tensor via nvJPEG, or None
 """
 
-import os
-import io
+import threading
 from pathlib import Path
 
 import torch
 import torch.nn.functional as F
 import numpy as np
 import cv2
-from PIL import Image
-from torchvision import transforms
 import base64
 
-from cnn_lstm_model import build_model, CNNLSTM
+from cnn_lstm_model import build_model, script_for_inference, select_quantized_engine, CNNLSTM, WithFeatures
+from config.loader import get_settings
+from services.image_io import as_bgr, decode_pool
 
 # ── Paths ──────────────────────────────────────────────────────────────────────
 BASE       = Path(__file__).parent.parent   # project root
 MODEL_PATH = BASE / "models" / "cnn_lstm_best.pth"
+ENGINE_PATH = BASE / "models" / "cnn_lstm.engine"   # scripts/export_cnn_lstm.py
+INT8_PATH  = BASE / "models" / "cnn_lstm_int8.pt"   # scripts/quantize_cnn_lstm.py
 IMG_SIZE   = 224
+HEATMAP_QUALITY = 85   # JPEG quality of the returned heatmap overlay
 
 DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
-# ── Inference transform ────────────────────────────────────────────────────────
-INFER_TF = transforms.Compose([
-    transforms.Resize((IMG_SIZE, IMG_SIZE)),
-    transforms.ToTensor(),
-    transforms.Normalize(mean=[0.485, 0.456, 0.406],
-                         std =[0.229, 0.224, 0.225]),
-])
+# Scripted serving copy runs FP16 on GPU, FP32 on CPU (see script_for_inference)
+INFER_DTYPE = torch.float16 if DEVICE.type == "cuda" else torch.float32
+
+# ── Inference normalisation ───────────────────────────────────────────────────
+# ImageNet mean / std as broadcastable [1, C, 1, 1] tensors on DEVICE
+MEAN = torch.tensor([0.485, 0.456, 0.406], device=DEVICE).view(1, 3, 1, 1)
+STD  = torch.tensor([0.229, 0.224, 0.225], device=DEVICE).view(1, 3, 1, 1)
+
+# ── Batched preprocessing ─────────────────────────────────────────────────────
+_staging = threading.local()
+
+
+def _staging_buffer(n: int) -> torch.Tensor:
+    """
+    This thread's [n, H, W, 3] uint8 host buffer — pinned on CUDA so the
+    upload can be non_blocking. Grown on demand, then reused across calls.
+    """
+    buf = getattr(_staging, "buf", None)
+    if buf is None or buf.shape[0] < n:
+        buf = torch.empty((n, IMG_SIZE, IMG_SIZE, 3), dtype=torch.uint8,
+                          pin_memory=DEVICE.type == "cuda")
+        _staging.buf = buf
+    return buf[:n]
+
+
+def _prep_into(item, out: np.ndarray):
+    """
+    Decode `item` if it is bytes, resize to IMG_SIZE and write it as RGB into
+    `out`. This one buffer feeds both the model input and the heatmap overlay.
+    """
+    img = as_bgr(item)
+    cv2.cvtColor(cv2.resize(img, (IMG_SIZE, IMG_SIZE), interpolation=cv2.INTER_AREA),
+                 cv2.COLOR_BGR2RGB, dst=out)
 
 
 # ── Model loader ──────────────────────────────────────────────────────────────
+_MODEL      = None
+_MODEL_LOCK = threading.Lock()
+_INFER_LOCK = threading.Lock()   # one forward on the device at a time per process
+
+
+def get_cnn_lstm_model() -> CNNLSTM:
+    """
+    The process-wide CNN+LSTM model, loaded by load_cnn_lstm_model() on the
+    first call only — re-imports and repeated callers share the same weights.
+    """
+    global _MODEL
+    if _MODEL is None:
+        with _MODEL_LOCK:
+            if _MODEL is None:
+                _MODEL = load_cnn_lstm_model()
+    return _MODEL
+
+
 def load_cnn_lstm_model() -> CNNLSTM:
     """Load the trained CNN+LSTM model. Returns None if weights not found."""
     model = build_model(pretrained=True).to(DEVICE)
 
     if MODEL_PATH.exists():
-        state = torch.load(str(MODEL_PATH), map_location=DEVICE)
+        # Memory-mapped, tensors-only load: load_state_dict copies straight
+        # from the page cache into the (possibly CUDA) parameters
+        state = torch.load(str(MODEL_PATH), map_location="cpu",
+                           mmap=True, weights_only=True)
         model.load_state_dict(state)
         print(f"✓ CNN+LSTM model loaded from {MODEL_PATH}")
     else:
@@ -52,73 +107,293 @@ def load_cnn_lstm_model() -> CNNLSTM:
         print("   Run:  python cnn_lstm_train.py  to train the model first.")
         print("   Using untrained model for demo purposes.")
 
-    model.eval()
+    # NHWC weights: cuDNN / oneDNN's native layout for the conv backbone
+    model.eval().to(memory_format=torch.channels_last)
+
+    # Reported as `model_loaded` in every response; fixed once loaded
+    object.__setattr__(model, "_weights_loaded", MODEL_PATH.exists())
+
+    # TensorRT engine, if one has been built for this GPU. _forward prefers
+    # it over every PyTorch backend, so those aren't built when it loads.
+    engine = None
+    if DEVICE.type == "cuda" and ENGINE_PATH.exists():
+        try:
+            engine = _TensorRTEngine(ENGINE_PATH)
+            print(f"✓ CNN+LSTM TensorRT engine loaded from {ENGINE_PATH}")
+        except Exception as e:
+            print(f"⚠️  Could not load TensorRT engine, using TorchScript: {e}")
+    object.__setattr__(model, "_trt", engine)
+
+    # Traced/frozen copy for the gradient-free forward (score + CAM features).
+    # Stored as a plain attribute (not a registered submodule) so state_dict()
+    # is unchanged.
+    object.__setattr__(model, "_scripted", _load_scripted(model) if engine is None else None)
+
+    # Optional torch.compile'd handle (same weights) for the scoring forward
+    serving  = get_settings().get("serving", {})
+    compiled = None
+    if engine is None and serving.get("cnn_lstm", {}).get("compile", False):
+        compiled = _compile(model)
+    object.__setattr__(model, "_compiled", compiled)
+
+    # CUDA graphs of the TorchScript forward, replayed instead of re-launching
+    # every kernel. reduce-overhead torch.compile already does this itself.
+    graphs = None
+    if (DEVICE.type == "cuda" and engine is None and compiled is None
+            and model._scripted is not None
+            and serving.get("cnn_lstm", {}).get("cuda_graphs", True)):
+        graphs = _cuda_graphs(model._scripted,
+                              serving.get("batching", {}).get("max_batch", 8))
+    object.__setattr__(model, "_graphs", graphs)
     return model
 
 
-# ── Grad-CAM ──────────────────────────────────────────────────────────────────
-class GradCAM:
-    """Grad-CAM on the last convolutional layer of the CNN backbone."""
-
-    def __init__(self, model: CNNLSTM):
-        self.model      = model
-        self.gradients  = None
-        self.activations = None
+def _cuda_graphs(scripted, max_batch: int):
+    """
+    A _CUDAGraphRunner for `scripted` with a graph captured for every batch
+    size 1..max_batch, or None if none could be captured. Runs at load time,
+    before app.py starts the batchers, so no capture ever overlaps serving.
+    """
+    try:
+        runner = _CUDAGraphRunner(scripted, max_batch)
+    except Exception as e:
+        print(f"⚠️  CUDA graphs unavailable, launching kernels directly: {e}")
+        return None
+    with torch.inference_mode():
+        for n in range(1, max_batch + 1):
+            try:
+                runner.capture(n)
+            except Exception as e:
+                print(f"⚠️  CUDA graph capture failed for batch {n}, running it directly: {e}")
+    if not runner.graphs:
+        return None
+    print(f"✓ CNN+LSTM CUDA graphs captured for batch sizes {sorted(runner.graphs)}")
+    return runner
+
+
+class _CUDAGraphRunner:
+    """
+    Replays CUDA graphs of a fixed-shape forward — one graph per batch size,
+    all captured up front by _cuda_graphs(); sizes without a graph run
+    directly. Inputs are copied into, and outputs cloned out of, each graph's
+    static buffers under a lock, so concurrent callers can't clobber each other.
+    """
 
-        # Hook onto the last conv block in MobileNetV3 features
-        target_layer = model.cnn[0][-1]  # last block in backbone.features
-        target_layer.register_forward_hook(self._save_activation)
-        target_layer.register_full_backward_hook(self._save_gradient)
+    def __init__(self, fn, max_batch: int):
+        self.fn        = fn
+        self.max_batch = max_batch
+        self.graphs    = {}                         # batch size → (graph, in, outs)
+        self.pool      = torch.cuda.graph_pool_handle()
+        self.lock      = threading.Lock()
+
+    def capture(self, n: int):
+        static_in = torch.zeros((n, 3, IMG_SIZE, IMG_SIZE), device=DEVICE, dtype=INFER_DTYPE)
+        static_in = static_in.to(memory_format=torch.channels_last)
+
+        # Warm up on a side stream (lazy init / autotuning must not be captured)
+        side = torch.cuda.Stream()
+        side.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(side):
+            for _ in range(3):
+                self.fn(static_in)
+        torch.cuda.current_stream().wait_stream(side)
+
+        # thread_local: don't reject allocations / syncs from other threads
+        # (YOLO, TensorFlow) sharing the GPU while this thread captures
+        graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(graph, pool=self.pool, capture_error_mode="thread_local"):
+            static_out = self.fn(static_in)
+        self.graphs[n] = (graph, static_in, static_out)
+
+    def __call__(self, x: torch.Tensor):
+        captured = self.graphs.get(x.shape[0])
+        if captured is None:
+            return self.fn(x)
+        with self.lock:
+            graph, static_in, (out, fmap) = captured
+            static_in.copy_(x)
+            graph.replay()
+            return out.clone(), fmap.clone()
+
+
+def _compile(model: CNNLSTM):
+    """
+    torch.compile `model` (wrapped to also return the CAM feature map) for the
+    no-grad forward and run one warm-up pass so the first request doesn't pay
+    the compile. Returns None if compilation isn't supported here.
+    """
+    try:
+        compiled = torch.compile(WithFeatures(model).eval(), mode="reduce-overhead", fullgraph=False)
+        x = torch.zeros(1, 3, IMG_SIZE, IMG_SIZE, device=DEVICE)
+        with torch.inference_mode(), torch.autocast(device_type=DEVICE.type,
+                                                    dtype=torch.float16,
+                                                    enabled=DEVICE.type == "cuda"):
+            compiled(x.to(memory_format=torch.channels_last))
+        print("✓ CNN+LSTM compiled with torch.compile (reduce-overhead)")
+        return compiled
+    except Exception as e:
+        print(f"⚠️  torch.compile unavailable, using TorchScript: {e}")
+        return None
+
+
+def _load_scripted(model: CNNLSTM):
+    """INT8 TorchScript on CPU if quantized, else a freshly frozen copy; None on failure."""
+    if DEVICE.type == "cpu" and INT8_PATH.exists():
+        try:
+            engine   = select_quantized_engine()
+            scripted = torch.jit.load(str(INT8_PATH), map_location=DEVICE)
+            print(f"✓ CNN+LSTM INT8 model loaded from {INT8_PATH} "
+                  f"({engine})")
+            return scripted
+        except Exception as e:
+            print(f"⚠️  Could not load INT8 model, using FP32: {e}")
+    try:
+        scripted = script_for_inference(model, DEVICE, IMG_SIZE)
+        print(f"✓ CNN+LSTM TorchScript inference copy ready ({INFER_DTYPE})")
+        return scripted
+    except Exception as e:
+        print(f"⚠️  TorchScript export failed, serving eager model: {e}")
+        return None
+
+
+class _TensorRTEngine:
+    """
+    Runs the [N, 3, H, W] → (logits [N, 1], [N, 576, h, w]) engine from
+    export_cnn_lstm.py. Batches larger than the engine's optimisation
+    profile allows are split into chunks.
+    """
 
-    def _save_activation(self, module, input, output):
-        self.activations = output.detach()
+    def __init__(self, path: Path):
+        import tensorrt as trt
+
+        logger = trt.Logger(trt.Logger.WARNING)
+        with open(path, "rb") as f, trt.Runtime(logger) as runtime:
+            self.engine = runtime.deserialize_cuda_engine(f.read())
+        if self.engine is None:
+            raise RuntimeError(f"failed to deserialize {path}")
+        self.context = self.engine.create_execution_context()
+        try:
+            # (min, opt, max) shapes of profile 0 for input "x"
+            self.max_batch = self.engine.get_tensor_profile_shape("x", 0)[2][0]
+        except Exception:
+            self.max_batch = 1                  # static engine from an older export
+
+    def __call__(self, batch: torch.Tensor):
+        batch = batch.to(DEVICE, dtype=torch.float32).contiguous()
+        torch.cuda.current_stream().synchronize()
+        outs, fmaps = [], []
+        for x in batch.split(self.max_batch):
+            x = x.contiguous()
+            n = x.shape[0]
+            if self.max_batch > 1:
+                self.context.set_input_shape("x", tuple(x.shape))
+            # Device buffers are plain torch CUDA tensors — no pycuda needed
+            out  = torch.empty((n, 1), device=DEVICE, dtype=torch.float32)
+            fmap = torch.empty((n, 576, IMG_SIZE // 32, IMG_SIZE // 32),
+                               device=DEVICE, dtype=torch.float32)
+            self.context.execute_v2([x.data_ptr(), out.data_ptr(), fmap.data_ptr()])
+            outs.append(out)
+            fmaps.append(fmap)
+        return torch.cat(outs), torch.cat(fmaps)
+
+
+def _forward(model: CNNLSTM, batch: torch.Tensor):
+    """
+    One no-grad forward over `batch` [N, C, H, W]. Returns (P(defective) per
+    image as a list, last conv feature map [N, 576, h, w]).
+    """
+    engine   = getattr(model, "_trt", None)
+    compiled = getattr(model, "_compiled", None)
+    scripted = getattr(model, "_scripted", None)
+    graphs   = getattr(model, "_graphs", None)
+    with torch.inference_mode():
+        if engine is not None:
+            out, fmap = engine(batch)
+        elif scripted is not None and compiled is None:
+            x = batch.to(dtype=INFER_DTYPE, memory_format=torch.channels_last)
+            out, fmap = (graphs or scripted)(x)
+        else:
+            # Eager / compiled module: channels_last input, FP16 autocast on CUDA
+            fn = compiled if compiled is not None else model.forward_features
+            x  = batch.to(memory_format=torch.channels_last)
+            with torch.autocast(device_type=DEVICE.type, dtype=torch.float16,
+                                enabled=DEVICE.type == "cuda"):
+                out, fmap = fn(x)
+    return torch.sigmoid(out[:, 0].float()).tolist(), fmap
+
+
+def _infer(model: CNNLSTM, batch: torch.Tensor):
+    """
+    _forward + _activation_cam under the process-wide inference lock, so
+    concurrent callers don't interleave work on one CUDA context.
+    Returns (P(defective) list, uint8 CAMs [N, H, W]).
+    """
+    with _INFER_LOCK:
+        probs, fmap = _forward(model, batch)
+        return probs, _activation_cam(fmap)
 
-    def _save_gradient(self, module, grad_in, grad_out):
-        self.gradients = grad_out[0].detach()
 
-    def generate(self, img_tensor: torch.Tensor) -> np.ndarray:
-        """
-        Returns a Grad-CAM heatmap as a uint8 numpy array (H x W).
+# ── Activation CAM ────────────────────────────────────────────────────────────
+def _activation_cam(fmap: torch.Tensor) -> np.ndarray:
+    """
+    Class-activation heatmaps from the last conv feature map [N, C, h, w]:
+    ReLU of the channel mean, normalised per image and resized to IMG_SIZE.
+    Needs only the forward pass already run for the score — no backward.
+    Everything stays on the feature map's device until the final uint8 maps.
+    Returns a uint8 numpy array (N x H x W).
+    """
+    cam = F.relu(fmap.float().mean(dim=1, keepdim=True))     # [N, 1, h, w]
 
-        img_tensor : [1, C, H, W]
-        """
-        self.model.zero_grad()
-        img_tensor = img_tensor.to(DEVICE).requires_grad_(True)
+    # Normalise each map independently (all-zero maps stay zero)
+    cam = cam / (cam.amax(dim=(2, 3), keepdim=True) + 1e-8)
 
-        out = self.model(img_tensor)            # [1, 1]
-        out[0, 0].backward()
+    cam = F.interpolate(cam, size=(IMG_SIZE, IMG_SIZE), mode="bilinear", align_corners=False)
+    return cam[:, 0].mul_(255).clamp_(0, 255).to(torch.uint8).cpu().numpy()
 
-        if self.gradients is None or self.activations is None:
-            return np.zeros((IMG_SIZE, IMG_SIZE), dtype=np.uint8)
 
-        # Pool gradients over spatial dims
-        grads  = self.gradients                          # [1, C, H, W]
-        acts   = self.activations                        # [1, C, H, W]
-        weights = grads.mean(dim=(2, 3), keepdim=True)   # [1, C, 1, 1]
+def _apply_heatmap(orig_img: np.ndarray, cam: np.ndarray) -> str:
+    """
+    Overlay the CAM on the IMG_SIZE x IMG_SIZE RGB model input (already
+    resized by the caller). Returns base64 JPEG string.
+    """
+    colormap  = cv2.applyColorMap(cam, cv2.COLORMAP_JET)             # BGR
+    orig_bgr  = cv2.cvtColor(orig_img, cv2.COLOR_RGB2BGR)
+    overlay   = cv2.addWeighted(orig_bgr, 0.5, colormap, 0.5, 0)
+    ok, buf   = cv2.imencode(".jpg", overlay, [cv2.IMWRITE_JPEG_QUALITY, HEATMAP_QUALITY])
+    if not ok:
+        raise RuntimeError("Could not encode the heatmap image.")
+    return base64.b64encode(buf).decode()
 
-        cam = (weights * acts).sum(dim=1, keepdim=True)  # [1, 1, H, W]
-        cam = F.relu(cam)
-        cam = cam.squeeze().cpu().numpy()
 
-        # Normalise
-        if cam.max() > 0:
-            cam = cam / cam.max()
+# ── GPU JPEG decode ───────────────────────────────────────────────────────────
+try:
+    from torchvision.io import decode_jpeg, ImageReadMode
+    _NVJPEG = DEVICE.type == "cuda"
+except ImportError:
+    _NVJPEG = False
 
-        cam = cv2.resize(cam, (IMG_SIZE, IMG_SIZE))
-        cam = (cam * 255).astype(np.uint8)
-        return cam
 
+def decode_to_gpu(image_bytes: bytes):
+    """
+    Decode JPEG bytes straight into a CUDA uint8 tensor [3, H, W] (RGB) via
+    nvJPEG, skipping the CPU decode and the later host→device copy.
 
-def _apply_heatmap(orig_img: np.ndarray, cam: np.ndarray) -> str:
-    """Overlay Grad-CAM on the original image. Returns base64 PNG string."""
-    colormap  = cv2.applyColorMap(cam, cv2.COLORMAP_JET)
-    colormap  = cv2.cvtColor(colormap, cv2.COLOR_BGR2RGB)
-    orig_rgb  = cv2.resize(orig_img, (IMG_SIZE, IMG_SIZE))
-    overlay   = (0.5 * orig_rgb + 0.5 * colormap).astype(np.uint8)
-    pil       = Image.fromarray(overlay)
-    buf       = io.BytesIO()
-    pil.save(buf, format="PNG")
-    return base64.b64encode(buf.getvalue()).decode()
+    Returns None when no GPU / nvJPEG is available or the bytes aren't a JPEG;
+    callers then fall back to cv2.imdecode on the CPU.
+    """
+    global _NVJPEG
+    if not _NVJPEG or image_bytes[:2] != b"\xff\xd8":
+        return None
+    try:
+        data = torch.frombuffer(bytearray(image_bytes), dtype=torch.uint8)
+        return decode_jpeg(data, mode=ImageReadMode.RGB, device=DEVICE)
+    except Exception as e:
+        # A corrupt upload just falls back; if cv2 can read what nvJPEG
+        # couldn't, the build / driver is the problem — stay on the CPU path
+        if cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR) is not None:
+            print(f"⚠️  GPU JPEG decode unavailable, using cv2.imdecode: {e}")
+            _NVJPEG = False
+        return None
 
 
 # ── Main inference function ────────────────────────────────────────────────────
@@ -132,38 +407,97 @@ def predict_cnn_lstm(model: CNNLSTM, image_bytes: bytes) -> dict:
       verdict          : 'GOOD' | 'DEFECTIVE'
       confidence       : float [0, 1]  — probability of being defective
       verdict_label    : 'PASS' | 'FAIL'
-      heatmap_image    : base64 PNG string (Grad-CAM overlay)
+      heatmap_image    : base64 JPEG string (activation CAM overlay)
       model_type       : 'CNN+LSTM'
       model_loaded     : bool
     """
-    # Decode
-    nparr    = np.frombuffer(image_bytes, np.uint8)
-    img_cv   = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-    if img_cv is None:
-        raise ValueError("Could not decode the uploaded image.")
-    img_rgb = cv2.cvtColor(img_cv, cv2.COLOR_BGR2RGB)
+    # nvJPEG decode straight to the GPU when possible, cv2 on the CPU otherwise
+    gpu_img = decode_to_gpu(image_bytes)
+    return predict_cnn_lstm_batch(model, [image_bytes if gpu_img is None else gpu_img])[0]
 
-    # Preprocess
-    pil_img    = Image.fromarray(img_rgb)
-    img_tensor = INFER_TF(pil_img).unsqueeze(0).to(DEVICE)  # [1, C, H, W]
 
-    # Grad-CAM + prediction
-    gcam = GradCAM(model)
-    with torch.enable_grad():
-        cam = gcam.generate(img_tensor.clone())
+def predict_cnn_lstm_array(model: CNNLSTM, img_bgr: np.ndarray) -> dict:
+    """
+    Run CNN+LSTM inference on an already-decoded H x W x 3 uint8 BGR array
+    (OpenCV channel order). Skips the encode/decode round-trip that
+    predict_cnn_lstm() needs for raw bytes; returns the same dict.
+    """
+    return predict_cnn_lstm_batch(model, [img_bgr])[0]
+
 
-    # Clean forward pass for final confidence
-    with torch.no_grad():
-        prob = model(img_tensor).item()  # P(defective)
+def predict_cnn_lstm_batch(model: CNNLSTM, crops_bgr: list) -> list:
+    """
+    Run CNN+LSTM inference on several images (e.g. YOLO crops) at once.
+    Each item is a BGR uint8 array, raw image bytes, or a CUDA uint8 RGB
+    tensor [3, H, W] from decode_to_gpu().
 
+    CPU items are decoded / resized in parallel into a reused (pinned, on
+    CUDA) staging buffer and uploaded together; GPU-decoded items are resized
+    on the device. Everything is scored as one [N, C, H, W] tensor in a
+    single forward pass, so per-call framework / kernel-launch overhead is
+    paid once instead of once per crop.
+
+    Returns
+    -------
+    list of dicts, same keys as predict_cnn_lstm(), in input order.
+    """
+    if not crops_bgr:
+        return []
+
+    n       = len(crops_bgr)
+    gpu_idx = [i for i, c in enumerate(crops_bgr) if isinstance(c, torch.Tensor)]
+    cpu_idx = [i for i, c in enumerate(crops_bgr) if not isinstance(c, torch.Tensor)]
+    rgb     = [None] * n                                 # IMG_SIZE² RGB previews
+
+    # CPU items: decode → resize → RGB into the staging buffer [M, H, W, 3]
+    if cpu_idx:
+        stage = _staging_buffer(len(cpu_idx))
+        host  = stage.numpy()
+        items = [crops_bgr[i] for i in cpu_idx]
+        if len(items) > 1:
+            list(decode_pool.map(_prep_into, items, host))
+        else:
+            _prep_into(items[0], host[0])
+        uploaded = stage.to(DEVICE, non_blocking=True).permute(0, 3, 1, 2).float()
+        for j, i in enumerate(cpu_idx):
+            rgb[i] = host[j]
+
+    if not gpu_idx:
+        batch = uploaded
+    else:
+        batch = torch.empty((n, 3, IMG_SIZE, IMG_SIZE), device=DEVICE)
+        if cpu_idx:
+            batch[cpu_idx] = uploaded
+        # GPU-decoded items: resize on the device; only the preview comes back
+        for i in gpu_idx:
+            rgb_224  = F.interpolate(crops_bgr[i].unsqueeze(0).float(), size=(IMG_SIZE, IMG_SIZE),
+                                     mode="bilinear", align_corners=False, antialias=True)
+            batch[i] = rgb_224[0]
+            rgb[i]   = rgb_224[0].round().clamp_(0, 255).byte().permute(1, 2, 0).cpu().numpy()
+
+    # → [N, C, H, W] float on DEVICE, normalised
+    batch = (batch / 255.0 - MEAN) / STD
+
+    # Single forward pass for all confidences and CAMs
+    probs, cams = _infer(model, batch)
+
+    loaded = _weights_loaded(model)
+    return [_build_result(p, img, cam, loaded) for p, img, cam in zip(probs, rgb, cams)]
+
+
+def _weights_loaded(model: CNNLSTM) -> bool:
+    """Whether trained weights were loaded (cached by load_cnn_lstm_model)."""
+    loaded = getattr(model, "_weights_loaded", None)
+    return MODEL_PATH.exists() if loaded is None else loaded
+
+
+def _build_result(prob: float, img_rgb: np.ndarray, cam: np.ndarray,
+                  model_loaded: bool) -> dict:
+    """Assemble the response dict for one image from its score and heatmap."""
     verdict       = "DEFECTIVE" if prob > 0.5 else "GOOD"
     verdict_label = "FAIL"      if prob > 0.5 else "PASS"
 
-    # Build annotated preview (original + heatmap)
-    img_resized   = cv2.resize(img_rgb, (IMG_SIZE, IMG_SIZE))
-    heatmap_b64   = _apply_heatmap(img_resized, cam)
-
-    model_loaded  = MODEL_PATH.exists()
+    heatmap_b64   = _apply_heatmap(img_rgb, cam)
 
     return {
         "verdict":       verdict,
@@ -0,0 +1,31 @@
+"""
+image_io.py
+===========
+Image decoding shared by the model services.
+
+Exposes:
+  as_bgr(img)      → BGR uint8 array from raw bytes (arrays pass through)
+  decode_pool      → ThreadPoolExecutor for decoding / resizing batch items
+  DECODE_WORKERS   → its worker count
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+# cv2.imdecode / resize release the GIL, so batch items decode in parallel
+DECODE_WORKERS = min(8, os.cpu_count() or 1)
+decode_pool    = ThreadPoolExecutor(max_workers=DECODE_WORKERS,
+                                    thread_name_prefix="decode")
+
+
+def as_bgr(img) -> np.ndarray:
+    """Decode raw bytes to a BGR array; arrays are passed through unchanged."""
+    if isinstance(img, np.ndarray):
+        return img
+    decoded = cv2.imdecode(np.frombuffer(img, np.uint8), cv2.IMREAD_COLOR)
+    if decoded is None:
+        raise ValueError("Could not decode the uploaded image.")
+    return decoded
@@ -10,10 +10,14 @@ Supports the 10-class unified model trained on:
 from ultralytics import YOLO
 import cv2
 import numpy as np
-from PIL import Image
 import base64
-from io import BytesIO
 import os
+import shutil
+import tempfile
+import torch
+
+from config.loader import get_settings
+from services.image_io import as_bgr, decode_pool
 
 # ── Class metadata ────────────────────────────────────────────────────────────
 CLASS_INFO = {
@@ -22,20 +26,85 @@ CLASS_INFO = {
 }
 
 MODEL_PATH   = "models/best.pt"
+ENGINE_PATH  = "models/best.engine"        # FP16 TensorRT export of MODEL_PATH
+INT8_ENGINE  = "models/best_int8.engine"   # INT8 TensorRT export of MODEL_PATH
 FALLBACK_PT  = "yolov8n.pt"
 CONF_THRESH  = 0.40   # minimum detection confidence
+IMG_SIZE     = 640
+JPEG_QUALITY = 85     # annotated image returned to the UI
+HALF         = torch.cuda.is_available()   # FP16 inference on GPU (engines carry their own precision)
+
+
+def _tensorrt_engine():
+    """
+    Path to a TensorRT engine for MODEL_PATH, exporting it on first use.
+    Returns None when disabled in settings, without CUDA, or if export fails.
+    """
+    serving = get_settings().get("serving", {})
+    cfg     = serving.get("yolo", {})
+    if not cfg.get("tensorrt", False) or not torch.cuda.is_available():
+        return None
+
+    int8   = bool(cfg.get("int8", False))
+    target = INT8_ENGINE if int8 else ENGINE_PATH
+    if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(MODEL_PATH):
+        return target
+
+    print(f"⏳ Exporting {MODEL_PATH} → TensorRT ({'INT8' if int8 else 'FP16'}), one-time …")
+    try:
+        export_args = {
+            "format":    "engine",
+            "half":      not int8,
+            "int8":      int8,
+            "dynamic":   True,
+            "batch":     serving.get("batching", {}).get("max_batch", 8),
+            "workspace": 4,
+            "imgsz":     IMG_SIZE,
+        }
+        if int8:
+            export_args["data"] = cfg.get("calibration_data", "dataset.yaml")
+        # Ultralytics writes <weights stem>.engine next to the weights, which
+        # for MODEL_PATH is the FP16 ENGINE_PATH. Export from a scratch copy
+        # (same filesystem, for the final rename) so building one precision
+        # never overwrites the other's cached engine.
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(MODEL_PATH)) as tmp:
+            weights  = shutil.copy2(MODEL_PATH, os.path.join(tmp, os.path.basename(MODEL_PATH)))
+            exported = YOLO(weights).export(**export_args)
+            os.replace(exported, target)
+        return target
+    except Exception as e:
+        print(f"⚠️  TensorRT export failed, using PyTorch weights: {e}")
+        return None
+
+
+def _model_info(is_custom):
+    """The `model_info` block of every detection response."""
+    return {
+        "type":   "Custom (trained)" if is_custom else "Pretrained YOLOv8n (fallback)",
+        "path":   MODEL_PATH if is_custom else FALLBACK_PT,
+        "classes": len(CLASS_INFO),
+    }
 
 
 def load_model():
     """Load the custom-trained model, falling back to YOLOv8n if not found."""
-    if os.path.exists(MODEL_PATH):
-        print(f"✓ Loading custom model: {MODEL_PATH}")
-        model = YOLO(MODEL_PATH)
+    is_custom = os.path.exists(MODEL_PATH)
+    if is_custom:
+        engine = _tensorrt_engine()
+        if engine:
+            print(f"✓ Loading TensorRT engine: {engine}")
+            model = YOLO(engine, task="detect")
+        else:
+            print(f"✓ Loading custom model: {MODEL_PATH}")
+            model = YOLO(MODEL_PATH)
     else:
         print(f"⚠️  Custom model not found at '{MODEL_PATH}'")
         print(f"   → Using fallback: {FALLBACK_PT}")
         print("   To train:  python prepare_dataset.py && python train.py")
         model = YOLO(FALLBACK_PT)
+
+    # Which weights are active is fixed at load — don't stat per request
+    object.__setattr__(model, "_model_info", _model_info(is_custom))
     return model
 
 
@@ -43,24 +112,79 @@ def predict_defects(model, image_bytes):
     """
     Run detection on raw image bytes.
 
+    Decodes the bytes and delegates to predict_defects_array().
+    """
+    # Decode image
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    img   = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Could not decode the uploaded image.")
+    return predict_defects_array(model, img)
+
+
+def predict_defects_array(model, img):
+    """
+    Run detection on an already-decoded image (H x W x 3 uint8, BGR order —
+    as returned by cv2.imdecode).
+
     Returns
     -------
     dict with keys:
         status          : 'PASS' or 'FAIL'
         defects         : list of detection dicts
         confidence      : max confidence across all detections
-        annotated_image : base64-encoded annotated PNG
+        annotated_image : base64-encoded annotated JPEG
         model_info      : info about which model was used
     """
-    # Decode image
-    nparr = np.frombuffer(image_bytes, np.uint8)
-    img   = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-    if img is None:
-        raise ValueError("Could not decode the uploaded image.")
-
     # Inference
-    results = model(img, conf=CONF_THRESH, verbose=False)[0]
+    results = model(img, conf=CONF_THRESH, half=HALF, verbose=False)[0]
+    return _build_result(model, results)
 
+
+def predict_defects_batch(model, imgs):
+    """
+    Run detection on a list of images in one batched model call.
+
+    Each item is either raw image bytes or a decoded BGR array; bytes are
+    decoded in parallel. Returns a list of dicts (same keys as
+    predict_defects_array), in input order.
+    """
+    if not imgs:
+        return []
+    if len(imgs) > 1:
+        imgs = list(decode_pool.map(as_bgr, imgs))
+    else:
+        imgs = [as_bgr(imgs[0])]
+    results = model(imgs, conf=CONF_THRESH, half=HALF, verbose=False)
+    return [_build_result(model, r) for r in results]
+
+
+def _annotate(img, defects):
+    """
+    Draw boxes + labels straight onto a copy of the BGR image with OpenCV
+    (instead of Ultralytics' results.plot()). Returns a base64 JPEG string.
+    """
+    annotated = img.copy()
+    for d in defects:
+        r, g, b = CLASS_INFO.get(d["class_id"], {}).get("color", (255, 200, 0))
+        color   = (b, g, r)                         # CLASS_INFO colours are RGB
+        x1, y1, x2, y2 = d["bbox"]
+        label   = f'{d["class"]} {d["confidence"]:.2f}'
+        cv2.rectangle(annotated, (x1, y1), (x2, y2), color, 2)
+        (tw, th), base = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+        ty = max(y1, th + base + 2)
+        cv2.rectangle(annotated, (x1, ty - th - base - 2), (x1 + tw + 2, ty), color, -1)
+        cv2.putText(annotated, label, (x1 + 1, ty - base - 1),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1, cv2.LINE_AA)
+
+    ok, buf = cv2.imencode(".jpg", annotated, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+    if not ok:
+        raise RuntimeError("Could not encode the annotated image.")
+    return base64.b64encode(buf).decode()
+
+
+def _build_result(model, results):
+    """Turn one Ultralytics Results object into the API response dict."""
     defects  = []
     max_conf = 0.0
 
@@ -83,20 +207,12 @@ def predict_defects(model, image_bytes):
     status = "PASS" if len(defects) == 0 else "FAIL"
 
     # Annotate
-    annotated = results.plot()
-    annotated = cv2.cvtColor(annotated, cv2.COLOR_BGR2RGB)
-    pil_img   = Image.fromarray(annotated)
-    buf       = BytesIO()
-    pil_img.save(buf, format="PNG")
-    img_b64   = base64.b64encode(buf.getvalue()).decode()
-
-    # Determine which model is active
-    is_custom = os.path.exists(MODEL_PATH)
-    model_info = {
-        "type":   "Custom (trained)" if is_custom else "Pretrained YOLOv8n (fallback)",
-        "path":   MODEL_PATH if is_custom else FALLBACK_PT,
-        "classes": len(CLASS_INFO),
-    }
+    img_b64 = _annotate(results.orig_img, defects)
+
+    # Which model is active (cached by load_model)
+    model_info = getattr(model, "_model_info", None)
+    if model_info is None:
+        model_info = _model_info(os.path.exists(MODEL_PATH))
 
     return {
         "status":          status,
@@ -10,6 +10,11 @@ echo.
 :: Change to the project directory (where app.py lives)
 cd /d "%~dp0"
 
+:: Pre-compile settings.yaml once (install step) if it hasn't been done yet.
+:: After editing settings.yaml re-run scripts\freeze_settings.py; a stale
+:: frozen file is ignored and the YAML is parsed instead.
+if not exist config\_settings_frozen.py python scripts\freeze_settings.py > nul
+
 :: Start Flask server in the background
 start /B python app.py
 
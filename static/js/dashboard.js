@@ -332,7 +332,7 @@ function renderResults(data) {
      if (ri) {
           const b64 = data.annotated_image || data.heatmap_image;
           if (b64) {
-               ri.src = `data:image/png;base64,${b64}`;
+               ri.src = `data:${b64.startsWith('/9j/') ? 'image/jpeg' : 'image/png'};base64,${b64}`;
                ri.style.opacity = '0';
                ri.onload = () => { ri.style.opacity = '1'; };
           }
@@ -220,9 +220,9 @@ function renderResults(data) {
 
     // Images — hide Original on PASS, show both on FAIL
     const resultB64 = data.heatmap_image || data.annotated_image;
-    if (resultB64) resultImage.src = `data:image/png;base64,${resultB64}`;
+    if (resultB64) resultImage.src = `data:${imageMime(resultB64)};base64,${resultB64}`;
     document.getElementById("resultImageTitle").textContent =
-        isCNN ? "Grad-CAM Heatmap" : (isPass ? "✅ Annotated — No Defects Found" : "❌ Annotated — Defects Highlighted");
+        isCNN ? "Activation Heatmap" : (isPass ? "✅ Annotated — No Defects Found" : "❌ Annotated — Defects Highlighted");
 
     // PASS → hide original card, full-width annotated
     // FAIL → show both side by side
@@ -499,6 +499,11 @@ function hexToRgba(hex, alpha) {
     return `rgba(${r},${g},${b},${alpha})`;
 }
 
+// MIME type of a base64 image returned by the API (JPEG or PNG)
+function imageMime(b64) {
+    return b64.startsWith("/9j/") ? "image/jpeg" : "image/png";
+}
+
 // ── Toast Notifications ────────────────────────────────────────────────
 function showToast(message, type = "pass") {
     let container = document.getElementById("toast-container");
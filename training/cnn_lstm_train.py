@@ -23,14 +23,16 @@ import argparse
 import os
 import json
 import random
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from time import time
 
+import cv2
+import numpy as np
 import torch
 import torch.nn as nn
 from torch.utils.data import Dataset, DataLoader
 from torchvision import transforms
-from PIL import Image
 
 from cnn_lstm_model import build_model
 
@@ -49,6 +51,7 @@ LR          = 1e-4
 VAL_SPLIT   = 0.20
 IMG_SIZE    = 224
 SEED        = 42
+NUM_WORKERS = min(8, os.cpu_count() or 2)   # DataLoader decode / augment workers
 
 
 # ── Dataset ───────────────────────────────────────────────────────────────────
@@ -57,45 +60,67 @@ class DefectDataset(Dataset):
 
     EXTS = {".jpg", ".jpeg", ".png", ".bmp"}
 
-    def __init__(self, samples: list, transform=None):
+    def __init__(self, samples: list, transform=None, preload: bool = False):
         """
         Parameters
         ----------
-        samples : list of (path_str, label_int) tuples
+        samples   : list of (path_str, label_int) tuples
+        preload   : decode every image once, resized to IMG_SIZE, into one
+                    contiguous uint8 [N, H, W, 3] array (for the val set —
+                    no random crop, so nothing changes between epochs)
         """
         self.samples   = samples
         self.transform = transform
+        self.images    = None
+        if preload:
+            self.images = np.empty((len(samples), IMG_SIZE, IMG_SIZE, 3), dtype=np.uint8)
+
+            def _fill(i):
+                rgb = self._read_rgb(samples[i][0])
+                self.images[i] = cv2.resize(rgb, (IMG_SIZE, IMG_SIZE),
+                                            interpolation=cv2.INTER_AREA)
+
+            # cv2 decode / resize release the GIL
+            with ThreadPoolExecutor(max_workers=NUM_WORKERS or 1) as pool:
+                list(pool.map(_fill, range(len(samples))))
+
+    @staticmethod
+    def _read_rgb(path: str) -> np.ndarray:
+        """cv2-decode `path` to RGB; unreadable files become a grey placeholder."""
+        bgr = cv2.imread(path, cv2.IMREAD_COLOR)
+        if bgr is None:
+            return np.full((IMG_SIZE, IMG_SIZE, 3), 128, dtype=np.uint8)
+        return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
 
     def __len__(self):
         return len(self.samples)
 
     def __getitem__(self, idx):
         path, label = self.samples[idx]
-        try:
-            img = Image.open(path).convert("RGB")
-        except Exception:
-            img = Image.new("RGB", (IMG_SIZE, IMG_SIZE), (128, 128, 128))
+        rgb = self.images[idx] if self.images is not None else self._read_rgb(path)
+        img = torch.from_numpy(rgb).permute(2, 0, 1)   # [3, H, W] uint8
         if self.transform:
             img = self.transform(img)
         return img, torch.tensor(label, dtype=torch.float32)
 
 
 # ── Transforms ────────────────────────────────────────────────────────────────
+# Operate on uint8 [3, H, W] tensors (cv2-decoded), not PIL images
 TRAIN_TF = transforms.Compose([
-    transforms.Resize((IMG_SIZE + 32, IMG_SIZE + 32)),
+    transforms.Resize((IMG_SIZE + 32, IMG_SIZE + 32), antialias=True),
     transforms.RandomCrop(IMG_SIZE),
     transforms.RandomHorizontalFlip(p=0.5),
     transforms.RandomVerticalFlip(p=0.3),
     transforms.RandomRotation(degrees=15),
+    transforms.ConvertImageDtype(torch.float32),
     transforms.ColorJitter(brightness=0.3, contrast=0.3, saturation=0.2, hue=0.05),
-    transforms.ToTensor(),
     transforms.Normalize(mean=[0.485, 0.456, 0.406],
                          std =[0.229, 0.224, 0.225]),
 ])
 
 VAL_TF = transforms.Compose([
-    transforms.Resize((IMG_SIZE, IMG_SIZE)),
-    transforms.ToTensor(),
+    transforms.Resize((IMG_SIZE, IMG_SIZE), antialias=True),
+    transforms.ConvertImageDtype(torch.float32),
     transforms.Normalize(mean=[0.485, 0.456, 0.406],
                          std =[0.229, 0.224, 0.225]),
 ])
@@ -134,7 +159,7 @@ def split_samples(samples, val_ratio=VAL_SPLIT, seed=SEED):
 
 
 # ── Training loop ─────────────────────────────────────────────────────────────
-def train(epochs=EPOCHS, lr=LR, batch_size=BATCH_SIZE):
+def train(epochs=EPOCHS, lr=LR, batch_size=BATCH_SIZE, num_workers=NUM_WORKERS):
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     print(f"\n  Device: {device}")
 
@@ -143,12 +168,22 @@ def train(epochs=EPOCHS, lr=LR, batch_size=BATCH_SIZE):
     train_s, val_s = split_samples(all_samples)
 
     train_ds = DefectDataset(train_s, TRAIN_TF)
-    val_ds   = DefectDataset(val_s,   VAL_TF)
-
-    train_dl = DataLoader(train_ds, batch_size=batch_size, shuffle=True,
-                          num_workers=0, pin_memory=(device.type == "cuda"))
-    val_dl   = DataLoader(val_ds,   batch_size=batch_size, shuffle=False,
-                          num_workers=0, pin_memory=(device.type == "cuda"))
+    val_ds   = DefectDataset(val_s,   VAL_TF, preload=True)
+
+    # Workers decode + augment in parallel and stay alive across epochs;
+    # pinned batches let the host→device copies below run non_blocking.
+    loader_kw = dict(
+        batch_size         = batch_size,
+        num_workers        = num_workers,
+        pin_memory         = device.type == "cuda",
+        persistent_workers = num_workers > 0,
+        prefetch_factor    = 4 if num_workers > 0 else None,
+    )
+    train_dl = DataLoader(train_ds, shuffle=True, **loader_kw)
+    # Val images are already decoded in memory — index them in-process
+    # rather than copying the array into worker processes.
+    val_dl   = DataLoader(val_ds, batch_size=batch_size, shuffle=False,
+                          pin_memory=device.type == "cuda")
 
     # Model
     model = build_model(pretrained=True).to(device)
@@ -156,7 +191,11 @@ def train(epochs=EPOCHS, lr=LR, batch_size=BATCH_SIZE):
     # Optimiser + scheduler
     optimizer = torch.optim.AdamW(model.parameters(), lr=lr, weight_decay=1e-4)
     scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, T_max=epochs)
-    criterion = nn.BCELoss()
+    criterion = nn.BCEWithLogitsLoss()   # fused sigmoid + BCE on the model's logits
+
+    # Mixed precision on CUDA: FP16 forward/backward, loss-scaled gradients
+    use_amp = device.type == "cuda"
+    scaler  = torch.amp.GradScaler("cuda", enabled=use_amp)
 
     MODELS_DIR.mkdir(exist_ok=True)
 
@@ -179,15 +218,18 @@ def train(epochs=EPOCHS, lr=LR, batch_size=BATCH_SIZE):
         train_correct = 0
 
         for imgs, labels in train_dl:
-            imgs, labels = imgs.to(device), labels.to(device).unsqueeze(1)
-            optimizer.zero_grad()
-            preds = model(imgs)
-            loss  = criterion(preds, labels)
-            loss.backward()
-            optimizer.step()
+            imgs   = imgs.to(device, non_blocking=True)
+            labels = labels.to(device, non_blocking=True).unsqueeze(1)
+            optimizer.zero_grad(set_to_none=True)
+            with torch.autocast(device_type=device.type, dtype=torch.float16, enabled=use_amp):
+                preds = model(imgs)
+                loss  = criterion(preds, labels)
+            scaler.scale(loss).backward()
+            scaler.step(optimizer)
+            scaler.update()
 
             train_loss    += loss.item() * imgs.size(0)
-            train_correct += ((preds > 0.5).float() == labels).sum().item()
+            train_correct += ((preds > 0).float() == labels).sum().item()
 
         scheduler.step()
 
@@ -198,11 +240,13 @@ def train(epochs=EPOCHS, lr=LR, batch_size=BATCH_SIZE):
 
         with torch.no_grad():
             for imgs, labels in val_dl:
-                imgs, labels = imgs.to(device), labels.to(device).unsqueeze(1)
-                preds = model(imgs)
-                loss  = criterion(preds, labels)
+                imgs   = imgs.to(device, non_blocking=True)
+                labels = labels.to(device, non_blocking=True).unsqueeze(1)
+                with torch.autocast(device_type=device.type, dtype=torch.float16, enabled=use_amp):
+                    preds = model(imgs)
+                    loss  = criterion(preds, labels)
                 val_loss    += loss.item() * imgs.size(0)
-                val_correct += ((preds > 0.5).float() == labels).sum().item()
+                val_correct += ((preds > 0).float() == labels).sum().item()
 
         # ── Stats ─────────────────────────────────────────────────
         n_train = len(train_ds)
@@ -253,6 +297,9 @@ if __name__ == "__main__":
     parser.add_argument("--epochs",     type=int,   default=EPOCHS)
     parser.add_argument("--lr",         type=float, default=LR)
     parser.add_argument("--batch-size", type=int,   default=BATCH_SIZE)
+    parser.add_argument("--workers",    type=int,   default=NUM_WORKERS,
+                        help="DataLoader worker processes (0 = load in the main process)")
     args = parser.parse_args()
 
-    train(epochs=args.epochs, lr=args.lr, batch_size=args.batch_size)
+    train(epochs=args.epochs, lr=args.lr, batch_size=args.batch_size,
+          num_workers=args.workers)